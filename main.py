@@ -1,21 +1,243 @@
 import sys
 import os
 import re
-import json
-import requests
-from PyQt5.QtCore import QProcess, Qt
+import orjson
+from PyQt5.QtCore import QProcess, QTimer, Qt
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton,
                              QLineEdit, QTextEdit, QLabel, QProgressBar, QComboBox,
                              QHBoxLayout, QListWidget, QListWidgetItem, QFileDialog, QMessageBox)
-from PyQt5.QtGui import QPixmap, QPalette, QColor
-from bs4 import BeautifulSoup
+from PyQt5.QtGui import QPixmap, QImage, QPalette, QColor
 import aiohttp
 import asyncio
-import platform
+import qasync
+import hashlib
+import select
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Define the path for the settings file
 SETTINGS_FILE = "settings.json"
 
+# Search results page: the JSON blob holding the results, matched on the raw bytes up to the end of its script tag
+INITIAL_DATA_MARKER = b'var ytInitialData = '
+INITIAL_DATA_RE = re.compile(rb'var ytInitialData = ({.*?});</script>')
+
+# Downloaded thumbnail images, named by the SHA-1 of their URL; the least recently used beyond the limit are pruned
+THUMBNAIL_CACHE_DIR = ".thumb_cache"
+THUMBNAIL_CACHE_MAX_FILES = 1024
+
+# Size search result thumbnails are displayed at, and the CDN image that comes in exactly that size
+THUMBNAIL_SIZE = (120, 90)
+THUMBNAIL_URL = 'https://i.ytimg.com/vi/{}/default.jpg'
+
+# Quality combo entries and the yt-dlp format selector MPV is given for each
+FORMAT_MAPPING = {
+    'Best': 'best',
+    '1080p': 'best[height<=1080]',
+    '720p': 'best[height<=720]',
+    '480p': 'best[height<=480]',
+    '360p': 'best[height<=360]',
+}
+
+# Console styles for light and dark mode
+CONSOLE_LIGHT_QSS = "background-color: white; color: black;"
+CONSOLE_DARK_QSS = "background-color: #2c2c2c; color: white;"
+
+# InnerTube search endpoint used by youtube.com itself
+INNERTUBE_SEARCH_URL = 'https://www.youtube.com/youtubei/v1/search?prettyPrint=false'
+INNERTUBE_CONTEXT = {'client': {'clientName': 'WEB', 'clientVersion': '2.20240101.00.00', 'hl': 'en'}}
+
+# Failures of a search source: network, undecodable JSON, or a response without the expected results layout
+SEARCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError, KeyError, IndexError)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+# JSON IPC socket shared by the embedded and detached MPV players
+MPV_SOCKET = "/tmp/mpvsocket"
+
+# Arguments every MPV launch shares; only the embed window, video and format vary
+MPV_BASE_ARGS = ('--no-cache', '--osc', f'--input-ipc-server={MPV_SOCKET}')
+
+# Seconds per field of a duration string, read right to left (SS, MM, HH)
+DURATION_UNITS = (1, 60, 3600)
+
+
+class LRUCache:
+    """ Mapping that drops least recently used entries once max_items or max_bytes is exceeded,
+    and entries older than ttl seconds when one is given """
+    def __init__(self, max_items, max_bytes=None, sizeof=None, ttl=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires = entry
+        if expires is not None and time.monotonic() >= expires:
+            del self.entries[key]
+            self.total_bytes -= size
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        size = self.sizeof(value) if self.sizeof else 0
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self.entries[key] = (value, size, expires)
+        self.total_bytes += size
+        while len(self.entries) > self.max_items or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+
+def pixmap_size(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class MpvIpc:
+    """ Persistent connection to MPV's JSON IPC socket """
+    def __init__(self, path):
+        self.path = path
+        self.sock = None
+        self.buffer = bytearray()
+        self.next_request_id = 0
+
+    def connect(self):
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+        except (OSError, AttributeError):
+            return False
+        sock.setblocking(False)
+        self.sock = sock
+        self.buffer.clear()
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def command(self, *args, timeout=0.05):
+        """ Send a command and return MPV's reply, or None if it did not answer in time """
+        self.next_request_id += 1
+        request_id = self.next_request_id
+        payload = orjson.dumps({'command': list(args), 'request_id': request_id}) + b'\n'
+        # A second attempt covers the socket having been replaced by a newly started player
+        for _ in range(2):
+            if self.sock is None and not self.connect():
+                return None
+            try:
+                self.sock.sendall(payload)
+                return self.read_reply(request_id, timeout)
+            except OSError:
+                self.close()
+        return None
+
+    def read_reply(self, request_id, timeout):
+        scanned = 0
+        while True:
+            newline = self.buffer.find(b'\n', scanned)
+            while newline != -1:
+                message = orjson.loads(self.buffer[:newline])
+                del self.buffer[:newline + 1]
+                # Skip events and replies to requests that already timed out
+                if message.get('request_id') == request_id:
+                    return message
+                newline = self.buffer.find(b'\n')
+            # Whatever is buffered now holds no newline; only search bytes received after it
+            scanned = len(self.buffer)
+
+            ready, _, _ = select.select([self.sock], [], [], timeout)
+            if not ready:
+                return None
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise ConnectionResetError('MPV closed the IPC socket')
+            self.buffer.extend(chunk)
+
+
+def thumbnail_cache_key(url, size=THUMBNAIL_SIZE):
+    """ Cache key (url, width, height) for a thumbnail scaled to size """
+    return (url,) + size
+
+
+def thumbnail_disk_path(key):
+    return os.path.join(THUMBNAIL_CACHE_DIR, hashlib.sha1(key[0].encode()).hexdigest())
+
+
+def read_cached_thumbnail(key):
+    """ Return the cached image bytes for key, or None when it is not on disk """
+    path = thumbnail_disk_path(key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # Bump the modification time so pruning treats this image as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def write_cached_thumbnail(key, data):
+    """ Store image bytes for key; the cache is best effort, so a failed write only means a later download """
+    path = thumbnail_disk_path(key)
+    # Write to a temporary name first so a crash never leaves a truncated image behind
+    try:
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        try:
+            os.remove(path + '.tmp')
+        except OSError:
+            pass
+
+
+def prune_thumbnail_disk_cache(max_files=THUMBNAIL_CACHE_MAX_FILES):
+    """ Delete leftover temporary files, then the least recently used thumbnails beyond max_files """
+    files = []
+    with os.scandir(THUMBNAIL_CACHE_DIR) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                # Left behind by a write that was interrupted before its rename
+                if entry.name.endswith('.tmp'):
+                    os.remove(entry.path)
+                    continue
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                # Removed or replaced while scanning; nothing left to prune for it
+                continue
+    if len(files) <= max_files:
+        return
+    files.sort()
+    for _, path in files[:len(files) - max_files]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Search results by query, and scaled thumbnail pixmaps by URL
+search_cache = LRUCache(64, ttl=600)
+thumbnail_cache = LRUCache(512, max_bytes=16 * 1024 * 1024, sizeof=pixmap_size)
+
+
 class YouTubeClient(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -43,6 +265,15 @@ class YouTubeClient(QMainWindow):
         self.left_layout.addWidget(self.search_button)
 
         self.video_list = QListWidget(self)
+        # Every row is as tall as its fixed-size thumbnail, so let Qt measure one row instead of all of them
+        self.video_list.setUniformItemSizes(True)
+        # Shown until a row's thumbnail arrives, or if it fails; built once and shared by every row
+        self.placeholder_thumbnail = QPixmap(*THUMBNAIL_SIZE)
+        self.placeholder_thumbnail.fill(QColor('#ccc'))
+        # Labels of the displayed rows still waiting for their thumbnail, by cache key
+        self.thumbnail_labels = {}
+        # Pool of (item, widget, thumbnail label, title label) rows reused by every search
+        self.result_rows = []
         self.left_layout.addWidget(self.video_list)
 
         self.console_output = QTextEdit(self)
@@ -55,7 +286,7 @@ class YouTubeClient(QMainWindow):
 
         self.quality_combo = QComboBox(self)
         self.quality_combo.setVisible(True)
-        self.quality_combo.addItems(['Best', '1080p', '720p', '480p', '360p'])
+        self.quality_combo.addItems(list(FORMAT_MAPPING))
         self.left_layout.addWidget(self.quality_combo)
 
         self.watch_button = QPushButton('Watch', self)
@@ -71,6 +302,8 @@ class YouTubeClient(QMainWindow):
         self.play_playlist_button.clicked.connect(self.play_playlist)
         self.left_layout.addWidget(self.play_playlist_button)
 
+        self.build_palettes()
+        self.dark_mode = False
         self.dark_mode_button = QPushButton('Toggle Dark Mode', self)
         self.dark_mode_button.clicked.connect(self.toggle_dark_mode)
         self.left_layout.addWidget(self.dark_mode_button)
@@ -85,7 +318,14 @@ class YouTubeClient(QMainWindow):
         self.right_layout.addWidget(self.mpv_widget)
         self.mpv_widget.setMouseTracking(True)
         self.mpv_widget.mouseMoveEvent = self.show_mpv_controls
+        self.last_osc_show = 0.0
         self.mpv_process = None
+        # Every MPV process started by this window that has not exited yet
+        self.mpv_processes = set()
+        self.mpv_wid = None
+        self.mpv_ipc = MpvIpc(MPV_SOCKET)
+        self.last_mpv_args_key = None
+        self.last_mpv_args = None
 
         # Media Controls
         self.media_controls_layout = QHBoxLayout()
@@ -106,13 +346,39 @@ class YouTubeClient(QMainWindow):
         self.is_fullscreen = False
         self.fullscreen_process = None
 
+        # Qt-integrated asyncio loop (see __main__) and an HTTP session kept alive across searches
+        self.loop = asyncio.get_event_loop()
+        self.http_session = None
+        self.inflight_thumbnails = {}
+        try:
+            os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+        except OSError as e:
+            # Thumbnails are then downloaded every time instead of cached; nothing else depends on the directory
+            self.console_output.append(f'Thumbnail disk cache unavailable: {e}')
+        self.search_task = None
+        self.search_query = None
+        # Bumped whenever the result rows are rebound; thumbnails for older results are not decoded
+        self.search_generation = 0
+
+        # Bounded pool for blocking work (image decoding) handed off by the loop
+        self.executor = ThreadPoolExecutor(max_workers=min(16, 2 * (os.cpu_count() or 1)))
+        prune = self.loop.run_in_executor(self.executor, prune_thumbnail_disk_cache)
+        prune.add_done_callback(self.report_prune_failure)
+
         # Playlist and current video URL
         self.playlist = []
         self.current_video_url = None
 
         # Load persistent settings (quality)
+        self.settings = {}
         self.load_quality_settings()
 
+        # Coalesce rapid quality changes into a single settings write
+        self.settings_save_timer = QTimer(self)
+        self.settings_save_timer.setSingleShot(True)
+        self.settings_save_timer.setInterval(1000)
+        self.settings_save_timer.timeout.connect(self.write_settings)
+
         # Connect quality change to save settings
         self.quality_combo.currentTextChanged.connect(self.save_quality_settings)
 
@@ -120,108 +386,250 @@ class YouTubeClient(QMainWindow):
         self.url_input.returnPressed.connect(self.search_button.click)
 
     def start_search(self):
-        asyncio.run(self.perform_search())
-
-    async def perform_search(self):
         query = self.url_input.text().strip()
+        # Repeated clicks or Enter presses while the same search is still running collapse into it
+        if self.search_task is not None and not self.search_task.done() and query == self.search_query:
+            return
+        self.search_query = query
+        self.search_task = self.loop.create_task(self.perform_search(query))
+
+    async def perform_search(self, query):
         if not query:
             self.console_output.append('Please enter a search query.')
             return
 
         self.console_output.append(f'Starting search for: {query}')
-        videos, next_page_token, prev_page_token = await self.search_videos(query)
+        # YouTube search ignores case and repeated whitespace, so the cache does too
+        cache_key = ' '.join(query.lower().split())
+        videos = search_cache.get(cache_key)
+        if videos is None:
+            videos, next_page_token, prev_page_token = await self.search_videos(query)
+            if videos:
+                search_cache.put(cache_key, videos)
+            # A newer search was started while this one was waiting on the network; its results win
+            if self.search_task is not asyncio.current_task():
+                return
+        # Show the rows straight away; thumbnails are filled in as soon as they are decoded
         self.display_search_results(videos)
+        await self.fetch_thumbnails(videos)
 
     async def search_videos(self, query):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
+        try:
+            return self.parse_search_results(await self.search_innertube(query)), None, None
+        except SEARCH_ERRORS as e:
+            self.console_output.append(f"InnerTube search failed ({e!r}), falling back to the results page")
+
+        try:
+            json_data = await self.search_results_page(query)
+            videos = self.parse_search_results(json_data) if json_data else []
+        except SEARCH_ERRORS as e:
+            self.console_output.append(f"Search failed: {e!r}")
+            videos = []
+        return videos, None, None
+
+    async def search_innertube(self, query):
+        """ Query YouTube's InnerTube search API, which returns the same data as ytInitialData """
+        session = self.get_http_session()
+        payload = orjson.dumps({'context': INNERTUBE_CONTEXT, 'query': query})
+        async with session.post(INNERTUBE_SEARCH_URL, data=payload,
+                                headers={'Content-Type': 'application/json'}) as response:
+            self.console_output.append(f"HTTP POST to {INNERTUBE_SEARCH_URL} returned status {response.status}")
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+
+    async def search_results_page(self, query):
+        """ Scrape ytInitialData out of the HTML results page """
         url = f"https://www.youtube.com/results?search_query={query}"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                self.console_output.append(f"HTTP GET to {url} returned status {response.status}")
-                videos = []
-
-                if response.status == 200:
-                    response_text = await response.text()
-                    soup = BeautifulSoup(response_text, 'html.parser')
-                    scripts = soup.find_all('script')
-                    for script in scripts:
-                        if 'var ytInitialData = ' in script.text:
-                            json_data = json.loads(re.search(r'var ytInitialData = ({.*?});', script.text).group(1))
-                            video_items = json_data['contents']['twoColumnSearchResultsRenderer']['primaryContents']['sectionListRenderer']['contents'][0]['itemSectionRenderer']['contents']
-                            for item in video_items:
-                                if 'videoRenderer' in item:
-                                    video_info = item['videoRenderer']
-                                    title = video_info['title']['runs'][0]['text']
-                                    video_id = video_info['videoId']
-                                    thumbnail_url = video_info['thumbnail']['thumbnails'][0]['url']
-                                    duration = self.parse_duration(video_info['lengthText']['simpleText']) if 'lengthText' in video_info else 0
-                                    author = video_info['ownerText']['runs'][0]['text'] if 'ownerText' in video_info else 'Unknown'
-                                    videos.append({
-                                        'title': title,
-                                        'videoId': video_id,
-                                        'thumbnail': thumbnail_url,
-                                        'duration': duration,
-                                        'author': author
-                                    })
-
-                return videos, None, None
+        session = self.get_http_session()
+        async with session.get(url) as response:
+            self.console_output.append(f"HTTP GET to {url} returned status {response.status}")
+            if response.status == 200:
+                # No DOM is built; the blob is cut straight out of the bytes and handed to orjson
+                match = INITIAL_DATA_RE.search(await self.read_until_initial_data(response))
+                if match:
+                    return orjson.loads(match.group(1))
+            return None
+
+    def parse_search_results(self, json_data):
+        videos = []
+        video_items = json_data['contents']['twoColumnSearchResultsRenderer']['primaryContents']['sectionListRenderer']['contents'][0]['itemSectionRenderer']['contents']
+        for item in video_items:
+            if 'videoRenderer' in item:
+                video_info = item['videoRenderer']
+                title = video_info['title']['runs'][0]['text']
+                video_id = video_info['videoId']
+                thumbnail_url = THUMBNAIL_URL.format(video_id)
+                duration = self.parse_duration(video_info['lengthText']['simpleText']) if 'lengthText' in video_info else 0
+                author = video_info['ownerText']['runs'][0]['text'] if 'ownerText' in video_info else 'Unknown'
+                videos.append({
+                    'title': title,
+                    'videoId': video_id,
+                    'thumbnail': thumbnail_url,
+                    'duration': duration,
+                    'author': author
+                })
+        return videos
+
+    async def fetch_thumbnails(self, videos):
+        """ Download all uncached thumbnails concurrently over the shared session """
+        generation = self.search_generation
+        pending = {}
+        for video in videos:
+            key = thumbnail_cache_key(video['thumbnail'])
+            if thumbnail_cache.get(key) is None:
+                pending[key] = video['thumbnail']
+
+        # Overlapping searches share a download that is already in flight rather than starting another
+        session = self.get_http_session()
+        downloads = []
+        for key, url in pending.items():
+            task = self.inflight_thumbnails.get(key)
+            if task is None:
+                task = self.loop.create_task(self.fetch_thumbnail(session, key, url))
+                self.inflight_thumbnails[key] = task
+            downloads.append(task)
+
+        results = await asyncio.gather(*downloads, return_exceptions=True)
+        # A newer search replaced these rows while downloading; the bytes are on disk if they come back
+        if generation != self.search_generation:
+            return
+        downloaded = {}
+        for result in results:
+            if isinstance(result, Exception):
+                self.console_output.append(f'Thumbnail download failed: {result}')
+                continue
+            key, data = result
+            # Another search sharing this download may have decoded it already
+            if thumbnail_cache.get(key) is None:
+                downloaded[key] = data
+        if not downloaded:
+            return
+
+        # QImage, unlike QPixmap, can be decoded and scaled off the GUI thread; do the whole batch in one job
+        images = await self.loop.run_in_executor(self.executor, self.decode_thumbnails, downloaded)
+        for key, image in images.items():
+            thumbnail = QPixmap.fromImage(image)
+            thumbnail_cache.put(key, thumbnail)
+            # Only rows of the results currently on screen are updated
+            for label in self.thumbnail_labels.get(key, ()):
+                label.setPixmap(thumbnail)
+
+    async def fetch_thumbnail(self, session, key, url):
+        try:
+            return key, await self.load_thumbnail_bytes(session, key, url)
+        finally:
+            self.inflight_thumbnails.pop(key, None)
+
+    async def load_thumbnail_bytes(self, session, key, url):
+        # Disk I/O runs on the executor like decoding, so a slow disk never stalls the GUI thread
+        data = await self.loop.run_in_executor(self.executor, read_cached_thumbnail, key)
+        if data is not None:
+            return data
+
+        async with session.get(url) as response:
+            # Error pages must not end up cached as blank thumbnails
+            response.raise_for_status()
+            data = await response.read()
+
+        await self.loop.run_in_executor(self.executor, write_cached_thumbnail, key, data)
+        return data
+
+    def report_prune_failure(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.console_output.append(f'Thumbnail disk cache cleanup failed: {future.exception()}')
+
+    def decode_thumbnails(self, downloaded):
+        return {key: QImage.fromData(data).scaled(key[1], key[2], Qt.KeepAspectRatio, Qt.FastTransformation)
+                for key, data in downloaded.items()}
+
+    async def read_until_initial_data(self, response):
+        """ Read the results page only up to the end of the ytInitialData script """
+        marker = INITIAL_DATA_MARKER
+        body = bytearray()
+        marker_pos = -1
+        async for chunk in response.content.iter_chunked(65536):
+            # Only rescan the new chunk plus enough overlap to catch a marker split across chunks
+            scan_from = max(len(body) - len(marker), 0)
+            body.extend(chunk)
+            if marker_pos == -1:
+                marker_pos = body.find(marker, scan_from)
+            if marker_pos != -1 and body.find(b'</script>', max(marker_pos, scan_from)) != -1:
+                break
+        return body
+
+    def get_http_session(self):
+        """ Return the shared aiohttp session, creating it on first use """
+        if self.http_session is None or self.http_session.closed:
+            # Pool sized for a page of thumbnails from i.ytimg.com, with DNS answers kept for 5 minutes
+            connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300,
+                                             keepalive_timeout=60)
+            self.http_session = aiohttp.ClientSession(connector=connector, headers={'User-Agent': USER_AGENT},
+                                                      timeout=aiohttp.ClientTimeout(total=10))
+        return self.http_session
 
     def display_search_results(self, videos):
         self.console_output.append('Search finished, displaying results...')
-        self.video_list.clear()
-        for video in videos:
-            item_widget = QWidget()
-            item_layout = QHBoxLayout()
+        # Rebind the pooled rows with painting suspended, so the list repaints once
+        video_list = self.video_list
+        placeholder = self.placeholder_thumbnail
+        rows = self.result_rows
+        self.thumbnail_labels = {}
+        self.search_generation += 1
+        video_list.setUpdatesEnabled(False)
+        while len(rows) < len(videos):
+            rows.append(self.create_result_row())
+        for video, (item, item_widget, thumbnail_label, title_label) in zip(videos, rows):
+            key = thumbnail_cache_key(video['thumbnail'])
+            thumbnail = thumbnail_cache.get(key)
+            if thumbnail is None:
+                thumbnail = placeholder
+                self.thumbnail_labels.setdefault(key, []).append(thumbnail_label)
+            thumbnail_label.setPixmap(thumbnail)
+            title_label.setText(f"{video['title']} ({video['videoId']})")
 
-            thumbnail_label = QLabel()
-            thumbnail = QPixmap()
-            thumbnail.loadFromData(requests.get(video['thumbnail']).content)
-            thumbnail_label.setPixmap(thumbnail.scaled(120, 90, Qt.KeepAspectRatio))
-            item_layout.addWidget(thumbnail_label)
+            item.setSizeHint(item_widget.sizeHint())
+            item.setData(Qt.UserRole, video)
+            item.setHidden(False)
+        for item, *_ in rows[len(videos):]:
+            item.setHidden(True)
+        video_list.setCurrentRow(-1)
+        video_list.scrollToTop()
+        video_list.setUpdatesEnabled(True)
 
-            title_label = QLabel(f"{video['title']} ({video['videoId']})")
-            title_label.setWordWrap(True)
-            item_layout.addWidget(title_label)
+        self.watch_button.setVisible(True)
 
-            item_widget.setLayout(item_layout)
+    def create_result_row(self):
+        """ Build one reusable result row; rows are kept and rebound across searches """
+        # Layout owned by the row from the start, so each label is parented once rather than reparented
+        item_widget = QWidget()
+        item_layout = QHBoxLayout(item_widget)
 
-            item = QListWidgetItem(self.video_list)
-            item.setSizeHint(item_widget.sizeHint())
-            self.video_list.setItemWidget(item, item_widget)
-            item.setData(Qt.UserRole, video)
+        thumbnail_label = QLabel()
+        item_layout.addWidget(thumbnail_label)
 
-            self.video_list.addItem(item)
+        title_label = QLabel()
+        title_label.setWordWrap(True)
+        item_layout.addWidget(title_label)
 
-        self.watch_button.setVisible(True)
+        # Constructing the item with the list as parent already inserts it
+        item = QListWidgetItem(self.video_list)
+        self.video_list.setItemWidget(item, item_widget)
+        return item, item_widget, thumbnail_label, title_label
 
     def toggle_attach_detach(self):
         if self.mpv_process:
             if self.is_fullscreen:
                 self.is_fullscreen = False
                 self.console_output.append("Exiting fullscreen and detaching MPV player.")
+                # Launch the detached player once the old one has actually exited
+                self.mpv_process.finished.connect(lambda *_: self.start_detached_player())
                 self.mpv_process.terminate()
-                self.mpv_process.waitForFinished()
+                return
 
             # Detach the video
-            self.mpv_process.write(b'set pause false\n')  # Resume the video if it was paused
-            self.console_output.append("Video detached to a new window.")
-            self.attach_detach_button.setText("Attach Video")
-            
-            command = [
-                'mpv',
-                '--no-cache',
-                '--osc',
-                self.current_video_url,
-                f'--ytdl-format={self.get_quality_option()}',
-                '--input-ipc-server=/tmp/mpvsocket'
-            ]
-            
-            # Start a new MPV process for detached playback
-            self.fullscreen_process = QProcess(self)
-            self.fullscreen_process.start(command[0], command[1:])
+            self.mpv_ipc.command('set_property', 'pause', False)  # Resume the video if it was paused
+            self.start_detached_player()
 
         else:
             # Reattach the video to the PyQt window
@@ -229,6 +637,14 @@ class YouTubeClient(QMainWindow):
             self.attach_detach_button.setText("Detach Video")
             self.start_mpv_player()  # Start the player again embedded in the window
 
+    def start_detached_player(self):
+        self.console_output.append("Video detached to a new window.")
+        self.attach_detach_button.setText("Attach Video")
+
+        # Start a new MPV process for detached playback; it will own the IPC socket from now on
+        self.mpv_ipc.close()
+        self.fullscreen_process = self.launch_mpv(self.get_mpv_args())
+
     def watch_video(self):
         current_item = self.video_list.currentItem()
         if current_item:
@@ -236,66 +652,97 @@ class YouTubeClient(QMainWindow):
             self.current_video_url = f"https://www.youtube.com/watch?v={video_data['videoId']}"
             self.console_output.append(f'Watching video: {video_data["title"]}')
 
-            # Kill all existing MPV instances before starting a new one
-            os_type = platform.system()  # Command to kill all running MPV instances
-            if os_type == "Windows":
-                os.system("taskkill /F /IM mpv.exe")
-            elif os_type == "Linux":
-                os.system("pkill mpv")
-            elif os_type == "Darwin":
-                os.system("pkilk mpv")
-            else:
-                self.console_output.append('Unsupported Operating System')
+            # Reuse the embedded player when it is running and owns the IPC socket, i.e. nothing is detached
+            detached = self.fullscreen_process is not None and self.fullscreen_process.state() != QProcess.NotRunning
+            if (not detached and self.mpv_process and self.mpv_process.state() == QProcess.Running
+                    and self.load_in_running_player()):
+                return
+
+            # Stop the players this window started before starting a new one
+            self.kill_mpv()
             self.start_mpv_player()
+            self.attach_detach_button.setText("Detach Video")
+
+    def launch_mpv(self, args):
+        """ Start an MPV process and track it until it exits, so kill_mpv can stop every player we started """
+        process = QProcess(self)
+        self.mpv_processes.add(process)
+        process.finished.connect(lambda *_: self.mpv_processes.discard(process))
+        process.start('mpv', args)
+        return process
+
+    def kill_mpv(self):
+        # Includes players whose references were since replaced, e.g. by the playlist or repeated detaches
+        for process in list(self.mpv_processes):
+            if process.state() != QProcess.NotRunning:
+                process.terminate()
+                if not process.waitForFinished(500):
+                    process.kill()
+        self.mpv_processes.clear()
+        self.mpv_process = None
+        self.fullscreen_process = None
+
+    def load_in_running_player(self):
+        """ Switch the running player to the current video over IPC instead of restarting MPV """
+        if self.mpv_ipc.command('set_property', 'ytdl-format', self.get_quality_option()) is None:
+            return False
+        reply = self.mpv_ipc.command('loadfile', self.current_video_url, 'replace')
+        if reply is None or reply.get('error') != 'success':
+            return False
+        self.console_output.append('Loaded video in the running MPV player.')
+        return True
 
     def start_mpv_player(self):
-        # Get the handle of the mpv_widget for embedding
-        wid = str(int(self.mpv_widget.winId()))
-
-        command = [
-            'mpv',
-            '--no-cache',
-            '--osc',
-            f'--wid={wid}',  # Embed in this widget
-            self.current_video_url,
-            f'--ytdl-format={self.get_quality_option()}',
-            '--input-ipc-server=/tmp/mpvsocket'
-        ]
-
-        self.mpv_process = QProcess(self)
-        self.mpv_process.start(command[0], command[1:])
+        # Get the handle of the mpv_widget for embedding; it stays valid for the widget's lifetime
+        if self.mpv_wid is None:
+            self.mpv_wid = str(int(self.mpv_widget.winId()))
+        wid = self.mpv_wid
+
+        # The new player replaces the IPC socket, so drop the connection to the old one
+        self.mpv_ipc.close()
+        self.mpv_process = self.launch_mpv(self.get_mpv_args(wid))
         self.console_output.append('MPV player started.')
 
+    def get_mpv_args(self, wid=None):
+        """ MPV arguments for the current video, embedded in window wid when given """
+        # Attach/detach toggles relaunch with identical arguments, so reuse the last list
+        key = (self.current_video_url, self.get_quality_option(), wid)
+        if key == self.last_mpv_args_key:
+            return self.last_mpv_args
+
+        args = [*MPV_BASE_ARGS, f'--ytdl-format={key[1]}', self.current_video_url]
+        if wid is not None:
+            args.append(f'--wid={wid}')  # Embed in this widget
+        self.last_mpv_args_key = key
+        self.last_mpv_args = args
+        return args
+
     def parse_duration(self, duration_text):
-        """ Convert duration text to seconds """
-        match = re.match(r'(\d+):(\d+)', duration_text)
-        if match:
-            minutes, seconds = map(int, match.groups())
-            return minutes * 60 + seconds
-        return 0
+        """ Convert duration text (SS, M:SS or H:MM:SS) to seconds """
+        try:
+            return sum(int(part) * unit for part, unit in zip(reversed(duration_text.split(':')), DURATION_UNITS))
+        except ValueError:
+            return 0
 
     def load_quality_settings(self):
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, 'r') as f:
-                settings = json.load(f)
-                quality = settings.get('quality', 'Best')
-                self.quality_combo.setCurrentText(quality)
+        try:
+            with open(SETTINGS_FILE, 'rb') as f:
+                self.settings = orjson.loads(f.read())
+        except FileNotFoundError:
+            return
+        quality = self.settings.get('quality', 'Best')
+        self.quality_combo.setCurrentText(quality)
 
     def save_quality_settings(self):
-        quality = self.quality_combo.currentText()
-        settings = {'quality': quality}
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f)
+        self.settings['quality'] = self.quality_combo.currentText()
+        self.settings_save_timer.start()
+
+    def write_settings(self):
+        with open(SETTINGS_FILE, 'wb') as f:
+            f.write(orjson.dumps(self.settings))
 
     def get_quality_option(self):
-        quality_map = {
-            'Best': 'best',
-            '1080p': 'best[height<=1080]',
-            '720p': 'best[height<=720]',
-            '480p': 'best[height<=480]',
-            '360p': 'best[height<=360]',
-        }
-        return quality_map.get(self.quality_combo.currentText(), 'best')
+        return FORMAT_MAPPING.get(self.quality_combo.currentText(), 'best')
 
     def add_to_playlist(self):
         if self.current_video_url:
@@ -312,46 +759,81 @@ class YouTubeClient(QMainWindow):
             self.start_mpv_player()
             self.console_output.append(f'Playing video from playlist: {video}')
 
+    def build_palettes(self):
+        """ Build the light and dark palettes once; toggling just swaps them """
+        self.light_palette = QPalette(self.palette())
+        self.light_palette.setColor(QPalette.Window, QColor(255, 255, 255))
+        self.light_palette.setColor(QPalette.WindowText, QColor(0, 0, 0))
+
+        self.dark_palette = QPalette(self.palette())
+        self.dark_palette.setColor(QPalette.Window, QColor(53, 53, 53))
+        self.dark_palette.setColor(QPalette.WindowText, QColor(255, 255, 255))
+
     def toggle_dark_mode(self):
-        palette = self.palette()
-        if palette.color(QPalette.Window) == QColor(255, 255, 255):
-            # Switch to dark mode
-            palette.setColor(QPalette.Window, QColor(53, 53, 53))
-            palette.setColor(QPalette.WindowText, QColor(255, 255, 255))
-            self.console_output.setStyleSheet("background-color: #2c2c2c; color: white;")
+        self.dark_mode = not self.dark_mode
+        if self.dark_mode:
+            self.setPalette(self.dark_palette)
+            self.console_output.setStyleSheet(CONSOLE_DARK_QSS)
         else:
-            # Switch to light mode
-            palette.setColor(QPalette.Window, QColor(255, 255, 255))
-            palette.setColor(QPalette.WindowText, QColor(0, 0, 0))
-            self.console_output.setStyleSheet("background-color: white; color: black;")
-        
-        self.setPalette(palette)
+            self.setPalette(self.light_palette)
+            self.console_output.setStyleSheet(CONSOLE_LIGHT_QSS)
 
     def play_pause_video(self):
         if self.mpv_process:
-            self.mpv_process.write(b'set pause toggle\n')
+            self.mpv_ipc.command('cycle', 'pause')
 
     def toggle_fullscreen(self):
         if self.mpv_process:
             if self.is_fullscreen:
-                self.mpv_process.write(b'quit\n')
+                self.mpv_ipc.command('set_property', 'fullscreen', False)
                 self.is_fullscreen = False
                 self.console_output.append("Exited fullscreen.")
             else:
-                self.mpv_process.write(b'fullscreen\n')
+                self.mpv_ipc.command('set_property', 'fullscreen', True)
                 self.is_fullscreen = True
                 self.console_output.append("Entered fullscreen.")
 
     def fast_forward_video(self):
         if self.mpv_process:
-            self.mpv_process.write(b'set speed 2.0\n')
+            self.mpv_ipc.command('set_property', 'speed', 2.0)
 
     def show_mpv_controls(self, event):
+        # Mouse moves arrive per pixel; the OSC stays up for a while, so re-show it at most twice a second
         if self.mpv_process:
-            self.mpv_process.write(b'osc\n')
+            now = time.monotonic()
+            if now - self.last_osc_show >= 0.5:
+                self.last_osc_show = now
+                self.mpv_ipc.command('script-message', 'osc-show', timeout=0)
+
+    async def shutdown_network(self):
+        """ Cancel outstanding searches and downloads, then close the shared HTTP session """
+        tasks = [task for task in (self.search_task, *self.inflight_thumbnails.values())
+                 if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.http_session is not None and not self.http_session.closed:
+            await self.http_session.close()
+
+    def closeEvent(self, event):
+        if self.settings_save_timer.isActive():
+            self.settings_save_timer.stop()
+            self.write_settings()
+        self.executor.shutdown(wait=False)
+        self.mpv_ipc.close()
+        super().closeEvent(event)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    # Run asyncio on top of the Qt event loop so searches never block the UI
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
     client = YouTubeClient()
     client.show()
-    sys.exit(app.exec_())
+    with loop:
+        # run_forever returns app.exec_()'s status once the last window closes
+        exit_code = loop.run_forever()
+        # Pending tasks and the HTTP session have to be finished on the loop before the loop itself is closed
+        loop.run_until_complete(client.shutdown_network())
+    sys.exit(exit_code)